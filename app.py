@@ -1,6 +1,9 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
+from pandas.api.types import union_categoricals
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pv
 import plotly.graph_objects as go
 import csv
 from datetime import datetime, date
@@ -13,24 +16,120 @@ st.set_page_config(
     layout="wide"
 )
 
+# Number of rows per page in the All Expenses table
+ROWS_PER_PAGE = 100
+
+# Number of expenses added in a session after which the CSV file is reloaded
+BUFFER_FLUSH_SIZE = 50
+
 # Initialize session state
 if 'expenses_updated' not in st.session_state:
     st.session_state.expenses_updated = False
 
+def format_inr(paise):
+    """Format an amount in paise as rupees for display"""
+    return f"₹{paise / 100:.2f}"
+
 def load_expenses():
-    """Load expenses from CSV file into a pandas DataFrame"""
+    """Load expenses, reusing this session's merged frame until its added rows are flushed"""
+    if 'expenses_df' in st.session_state and st.session_state.get('expenses_added', 0) < BUFFER_FLUSH_SIZE:
+        return st.session_state.expenses_df
+    
+    # Reload from the CSV file (cached while it is unchanged)
+    st.session_state.pop('expenses_df', None)
+    st.session_state.expenses_added = 0
+    try:
+        mtime = os.path.getmtime("expenses.csv")
+    except FileNotFoundError:
+        mtime = 0.0
+    return _load_expenses_cached(mtime)
+
+def _insert_categorical(values, position, value):
+    """Return categorical values with one value inserted at position"""
+    # Merge the categories on their codes instead of re-encoding every string
+    merged = union_categoricals([values, pd.Categorical([value])], sort_categories=True)
+    codes = np.insert(merged.codes[:-1], position, merged.codes[-1])
+    return pd.Categorical.from_codes(codes, dtype=merged.dtype)
+
+def _insert_expense(df, expense_date, category, paise):
+    """Return a new expenses DataFrame with one expense inserted in date order"""
+    expense_ts = pd.Timestamp(expense_date)
+    month = str(expense_ts.to_period('M'))
+    if df.empty:
+        return pd.DataFrame({
+            'date': [expense_ts],
+            'category': pd.Categorical([category]),
+            'amount': np.array([paise], dtype='int64'),
+            'month': pd.Categorical([month])
+        })
+    
+    # Insert after any expenses on the same date, matching file order
+    position = df['date'].searchsorted(expense_ts, side='right')
+    return pd.DataFrame({
+        'date': np.insert(df['date'].values, position, expense_ts.to_datetime64()),
+        'category': _insert_categorical(df['category'], position, category),
+        'amount': np.insert(df['amount'].values, position, paise),
+        'month': _insert_categorical(df['month'], position, month)
+    })
+
+def _read_expenses_csv():
+    """Read the raw expense columns from the CSV file"""
     try:
-        if os.path.exists("expenses.csv"):
-            df = pd.read_csv("expenses.csv", names=['date', 'category', 'amount'])
-            # Filter out empty rows
-            df = df.dropna().reset_index(drop=True)
-            if not df.empty:
-                # Convert amount to numeric and date to datetime
-                df['amount'] = pd.to_numeric(df['amount'], errors='coerce')
-                df['date'] = pd.to_datetime(df['date'], errors='coerce')
-                # Remove rows with invalid data
-                df = df.dropna().reset_index(drop=True)
-                return df
+        # Multithreaded Arrow reader with a fixed schema (no type inference)
+        table = pv.read_csv(
+            "expenses.csv",
+            read_options=pv.ReadOptions(column_names=['date', 'category', 'amount']),
+            convert_options=pv.ConvertOptions(
+                column_types={
+                    'date': pa.timestamp('ns'),
+                    'category': pa.string(),
+                    'amount': pa.float64()
+                },
+                timestamp_parsers=["%Y-%m-%d"],
+                strings_can_be_null=True
+            )
+        )
+        return table.to_pandas()
+    except pa.ArrowInvalid:
+        # Malformed rows: fall back to pandas and coerce invalid values to NaN
+        # Declaring every column's dtype skips pandas' inference pass
+        df = pd.read_csv(
+            "expenses.csv",
+            names=['date', 'category', 'amount'],
+            header=None,
+            dtype={'date': str, 'category': str, 'amount': str},
+            on_bad_lines='skip',
+            engine='c'
+        )
+        # Convert amount to numeric and date to datetime
+        df['amount'] = pd.to_numeric(df['amount'], errors='coerce')
+        # Dates are always written as %Y-%m-%d, so skip format inference
+        df['date'] = pd.to_datetime(df['date'], format="%Y-%m-%d", errors='coerce', cache=True)
+        return df
+
+@st.cache_data(show_spinner=False, max_entries=1)
+def _load_expenses_cached(mtime):
+    """Load expenses from CSV file into a pandas DataFrame (mtime is the cache key)"""
+    try:
+        df = _read_expenses_csv()
+        # Remove empty rows and rows with invalid data
+        df = df.dropna().reset_index(drop=True)
+        if not df.empty:
+            # Sort once by date (stable, so same-day rows keep file order);
+            # expenses can be added for past dates, so the file isn't sorted
+            if not df['date'].is_monotonic_increasing:
+                df = df.sort_values('date', kind='stable', ignore_index=True)
+            # Hold amounts as integer paise so sums are exact
+            df['amount'] = (df['amount'] * 100).round().astype('int64')
+            # Store category as a categorical so grouping works on integer codes
+            df['category'] = df['category'].astype('category')
+            # Precompute the month once here instead of on every summary;
+            # as a categorical only the distinct months are formatted as strings
+            df['month'] = df['date'].dt.to_period('M').astype('category').cat.rename_categories(str)
+            return df
+        return pd.DataFrame(columns=['date', 'category', 'amount'])
+    except FileNotFoundError:
+        # No expenses recorded yet
         return pd.DataFrame(columns=['date', 'category', 'amount'])
     except Exception as e:
         st.error(f"Error loading expenses: {str(e)}")
@@ -48,14 +147,23 @@ def add_expense(expense_date, category, amount):
             st.error("Amount must be greater than 0!")
             return False
         
+        # Current frame for this session, taken before the file changes
+        df = load_expenses()
+        
         # Format date as string
         date_str = expense_date.strftime("%Y-%m-%d")
         
         # Append to CSV file
-        with open("expenses.csv", "a", newline="") as file:
+        with open("expenses.csv", "a", newline="", buffering=65536) as file:
             writer = csv.writer(file)
             writer.writerow([date_str, category.strip(), amount])
         
+        # Merge the new row into this session's frame once, so reruns don't re-read the file
+        st.session_state.expenses_df = _insert_expense(
+            df, expense_date, category.strip(), int(round(amount * 100))
+        )
+        st.session_state.expenses_added = st.session_state.get('expenses_added', 0) + 1
+        
         st.success("✅ Expense added successfully!")
         st.session_state.expenses_updated = True
         return True
@@ -63,34 +171,194 @@ def add_expense(expense_date, category, amount):
         st.error(f"Error adding expense: {str(e)}")
         return False
 
-def create_monthly_summary(df):
-    """Create monthly summary from expenses DataFrame"""
-    if df.empty:
-        return pd.DataFrame(columns=['Month', 'Total Amount'])
-    
-    # Add month column
-    df_copy = df.copy()
-    df_copy['month'] = df_copy['date'].dt.to_period('M')
-    
-    # Group by month and sum amounts
-    monthly_summary = df_copy.groupby('month')['amount'].sum().reset_index()
-    monthly_summary['month'] = monthly_summary['month'].astype(str)
+def create_monthly_summary(by_month_category):
+    """Create monthly summary from month/category grouped amounts"""
+    # Collapse the category level and sum amounts per month
+    monthly_summary = by_month_category.groupby(level='month', observed=True, sort=True).sum().reset_index()
     monthly_summary.columns = ['Month', 'Total Amount']
     
     return monthly_summary
 
-def create_category_summary(df):
-    """Create category summary from expenses DataFrame"""
-    if df.empty:
-        return pd.DataFrame(columns=['Category', 'Total Amount'])
-    
-    # Group by category and sum amounts
-    category_summary = df.groupby('category')['amount'].sum().reset_index()
+def create_category_summary(by_month_category):
+    """Create category summary from month/category grouped amounts"""
+    # Collapse the month level and sum amounts per category
+    category_summary = by_month_category.groupby(level='category', observed=True, sort=False).sum().reset_index()
     category_summary.columns = ['Category', 'Total Amount']
     category_summary = category_summary.sort_values('Total Amount', ascending=False)
     
     return category_summary
 
+@st.cache_data(show_spinner=False, max_entries=8)
+def build_summaries(df):
+    """Build monthly and category summaries from a single groupby pass"""
+    if df.empty:
+        return (
+            pd.DataFrame(columns=['Month', 'Total Amount']),
+            pd.DataFrame(columns=['Category', 'Total Amount'])
+        )
+    
+    # Group once by month and category; both summaries are reduced from this
+    by_month_category = df.groupby(['month', 'category'], observed=True)['amount'].sum()
+    
+    return create_monthly_summary(by_month_category), create_category_summary(by_month_category)
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def create_category_pie(category_df):
+    """Create pie chart of the category summary"""
+    fig = go.Figure(go.Pie(
+        labels=category_df['Category'].astype(str),
+        values=category_df['Total Amount'] / 100,
+        textposition='inside',
+        textinfo='percent+label'
+    ))
+    fig.update_layout(title="Expense Distribution by Category")
+    
+    return fig
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def create_monthly_bar(monthly_df):
+    """Create bar chart of the monthly summary"""
+    fig = go.Figure(go.Bar(
+        x=monthly_df['Month'].astype(str),
+        y=monthly_df['Total Amount'] / 100,
+        name='Amount (₹)'
+    ))
+    fig.update_layout(
+        title="Monthly Expense Trends",
+        xaxis_title="Month",
+        yaxis_title="Total Spending (₹)"
+    )
+    
+    return fig
+
+@st.cache_data(show_spinner=False, max_entries=1)
+def create_filtered_csv(filtered_df):
+    """Create the CSV download of the filtered expenses, with amounts in rupees"""
+    return filtered_df[['date', 'category', 'amount']].assign(
+        amount=filtered_df['amount'] / 100
+    ).to_csv(index=False)
+
+def render_monthly_summary(monthly_df):
+    """Render the Monthly Summary tab"""
+    st.header("Monthly Expense Summary")
+    
+    if not monthly_df.empty:
+        # Format the amounts for display at render time
+        st.dataframe(
+            monthly_df.style.format({'Total Amount': format_inr}),
+            use_container_width=True
+        )
+    else:
+        st.info("No monthly data available.")
+
+def render_category_breakdown(category_df):
+    """Render the Category Breakdown tab"""
+    st.header("Expenses by Category")
+    
+    if not category_df.empty:
+        # Create pie chart
+        fig_pie = create_category_pie(category_df)
+        st.plotly_chart(fig_pie, use_container_width=True)
+        
+        # Display category table
+        st.subheader("Category Summary Table")
+        st.dataframe(
+            category_df.style.format({'Total Amount': format_inr}),
+            use_container_width=True
+        )
+    else:
+        st.info("No category data available.")
+
+def render_monthly_chart(monthly_df):
+    """Render the Monthly Chart tab"""
+    st.header("Monthly Spending Trends")
+    
+    if not monthly_df.empty:
+        # Create bar chart
+        fig_bar = create_monthly_bar(monthly_df)
+        st.plotly_chart(fig_bar, use_container_width=True)
+    else:
+        st.info("No monthly trend data available.")
+
+@st.fragment
+def render_all_expenses(df):
+    """Render the All Expenses tab; filter changes rerun only this fragment"""
+    st.header("All Expenses")
+    
+    # Add filtering options
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        # Category filter
+        categories = ['All'] + df['category'].cat.categories.tolist()
+        selected_category = st.selectbox("Filter by Category:", categories)
+    
+    with col2:
+        # Date range filter
+        min_date = df['date'].iloc[0].date()
+        max_date = df['date'].iloc[-1].date()
+        date_range = st.date_input(
+            "Filter by Date Range:",
+            value=(min_date, max_date),
+            min_value=min_date,
+            max_value=max_date
+        )
+    
+    # Apply filters as one combined boolean mask
+    mask = np.ones(len(df), dtype=bool)
+    
+    if selected_category != 'All':
+        mask &= (df['category'].values == selected_category)
+    
+    if len(date_range) == 2:
+        start_date, end_date = date_range
+        # Compare raw datetime64 values; the end bound covers the whole end day
+        start_ts = pd.Timestamp(start_date).to_datetime64()
+        end_ts = (pd.Timestamp(end_date) + pd.Timedelta(days=1)).to_datetime64()
+        dates = df['date'].values
+        mask &= (dates >= start_ts) & (dates < end_ts)
+    
+    filtered_df = df.iloc[mask]
+    
+    # Display filtered data
+    if not filtered_df.empty:
+        # Expenses are kept in date order, so most recent first is a reversed view
+        display_df = filtered_df[['date', 'category', 'amount']].iloc[::-1]
+        
+        # Only send one page of rows to the browser
+        page_count = max(1, (len(display_df) + ROWS_PER_PAGE - 1) // ROWS_PER_PAGE)
+        page = 1
+        if page_count > 1:
+            page = st.number_input("Page", min_value=1, max_value=page_count, value=1, step=1)
+        first_row = (page - 1) * ROWS_PER_PAGE
+        display_df = display_df.iloc[first_row:first_row + ROWS_PER_PAGE]
+        
+        # Format for display
+        display_df = display_df.assign(date=np.datetime_as_string(display_df['date'].values, unit='D'))
+        display_df.columns = ['Date', 'Category', 'Amount']
+        
+        st.dataframe(
+            display_df.style.format({'Amount': format_inr}),
+            use_container_width=True
+        )
+        
+        if page_count > 1:
+            st.caption(
+                f"Showing rows {first_row + 1}-{first_row + len(display_df)} of {len(filtered_df)} "
+                f"(page {page} of {page_count}); download full as CSV"
+            )
+            st.download_button(
+                "Download CSV",
+                data=create_filtered_csv(filtered_df),
+                file_name="filtered_expenses.csv",
+                mime="text/csv"
+            )
+        
+        # Summary of filtered data
+        st.info(f"Showing {len(filtered_df)} transactions totaling {format_inr(filtered_df['amount'].sum())}")
+    else:
+        st.info("No expenses match the selected filters.")
+
 def main():
     """Main Streamlit application"""
     
@@ -134,131 +402,44 @@ def main():
         st.info("🚀 No expenses recorded yet! Use the sidebar to add your first expense.")
         return
     
-    # Display statistics
+    # Display statistics (the paise total stays an exact int64; categories are already unique)
+    total_paise = df['amount'].sum()
+    transaction_count = len(df)
+    unique_categories = len(df['category'].cat.categories)
+    
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("Total Expenses", f"₹{df['amount'].sum():.2f}")
+        st.metric("Total Expenses", format_inr(total_paise))
     
     with col2:
-        st.metric("Number of Transactions", len(df))
+        st.metric("Number of Transactions", transaction_count)
     
     with col3:
-        st.metric("Average Transaction", f"₹{df['amount'].mean():.2f}")
+        st.metric("Average Transaction", format_inr(total_paise / transaction_count))
     
     with col4:
-        unique_categories = df['category'].nunique()
         st.metric("Categories Used", unique_categories)
     
     st.markdown("---")
     
+    # Monthly and category summaries shared by the tabs below
+    monthly_df, category_df = build_summaries(df)
+    
     # Tabs for different views
     tab1, tab2, tab3, tab4 = st.tabs(["📊 Monthly Summary", "🥧 Category Breakdown", "📈 Monthly Chart", "📋 All Expenses"])
     
     with tab1:
-        st.header("Monthly Expense Summary")
-        monthly_df = create_monthly_summary(df)
-        
-        if not monthly_df.empty:
-            # Format the amounts for display
-            monthly_df['Total Amount'] = monthly_df['Total Amount'].apply(lambda x: f"₹{x:.2f}")
-            st.dataframe(monthly_df, use_container_width=True)
-        else:
-            st.info("No monthly data available.")
+        render_monthly_summary(monthly_df)
     
     with tab2:
-        st.header("Expenses by Category")
-        category_df = create_category_summary(df)
-        
-        if not category_df.empty:
-            # Create pie chart
-            fig_pie = px.pie(
-                category_df, 
-                values='Total Amount', 
-                names='Category',
-                title="Expense Distribution by Category"
-            )
-            fig_pie.update_traces(textposition='inside', textinfo='percent+label')
-            st.plotly_chart(fig_pie, use_container_width=True)
-            
-            # Display category table
-            st.subheader("Category Summary Table")
-            category_display = category_df.copy()
-            category_display['Total Amount'] = category_display['Total Amount'].apply(lambda x: f"₹{x:.2f}")
-            st.dataframe(category_display, use_container_width=True)
-        else:
-            st.info("No category data available.")
+        render_category_breakdown(category_df)
     
     with tab3:
-        st.header("Monthly Spending Trends")
-        monthly_df = create_monthly_summary(df)
-        
-        if not monthly_df.empty:
-            # Create bar chart
-            fig_bar = px.bar(
-                monthly_df,
-                x='Month',
-                y='Total Amount',
-                title="Monthly Expense Trends",
-                labels={'Total Amount': 'Amount (₹)'}
-            )
-            fig_bar.update_layout(xaxis_title="Month", yaxis_title="Total Spending (₹)")
-            st.plotly_chart(fig_bar, use_container_width=True)
-        else:
-            st.info("No monthly trend data available.")
+        render_monthly_chart(monthly_df)
     
     with tab4:
-        st.header("All Expenses")
-        
-        # Add filtering options
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            # Category filter
-            categories = ['All'] + sorted(df['category'].unique().tolist())
-            selected_category = st.selectbox("Filter by Category:", categories)
-        
-        with col2:
-            # Date range filter
-            min_date = df['date'].min().date()
-            max_date = df['date'].max().date()
-            date_range = st.date_input(
-                "Filter by Date Range:",
-                value=(min_date, max_date),
-                min_value=min_date,
-                max_value=max_date
-            )
-        
-        # Apply filters
-        filtered_df = df.copy()
-        
-        if selected_category != 'All':
-            filtered_df = filtered_df[filtered_df['category'] == selected_category]
-        
-        if len(date_range) == 2:
-            start_date, end_date = date_range
-            filtered_df = filtered_df[
-                (filtered_df['date'].dt.date >= start_date) & 
-                (filtered_df['date'].dt.date <= end_date)
-            ]
-        
-        # Display filtered data
-        if not filtered_df.empty:
-            # Format for display
-            display_df = filtered_df.copy()
-            display_df['date'] = display_df['date'].dt.strftime('%Y-%m-%d')
-            display_df['amount'] = display_df['amount'].apply(lambda x: f"₹{x:.2f}")
-            display_df.columns = ['Date', 'Category', 'Amount']
-            
-            # Sort by date (most recent first)
-            display_df = display_df.sort_values('Date', ascending=False)
-            
-            st.dataframe(display_df, use_container_width=True)
-            
-            # Summary of filtered data
-            st.info(f"Showing {len(filtered_df)} transactions totaling ₹{filtered_df['amount'].sum():.2f}")
-        else:
-            st.info("No expenses match the selected filters.")
+        render_all_expenses(df)
     
     # Footer
     st.markdown("---")